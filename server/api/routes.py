@@ -16,6 +16,10 @@ from server.api.schemas import (
 # AI 예측 서비스
 from server.services.predictor import run_prediction
 
+# 장중 실시간 시세 (인제스터 미실행 시 비어 있어 DB 값 그대로 반환)
+# Date(일봉 날짜)는 오래된 장중 데이터가 최신 일봉을 덮어쓰지 않도록 비교하는 용도
+from server.pipeline.intraday import intraday_store
+
 router = APIRouter()
 
 
@@ -26,6 +30,7 @@ router = APIRouter()
 def get_major_indices(db: Session = Depends(get_db)):
     """
     [기능] 미국 3대 지수(^GSPC, ^DJI, ^IXIC)의 최신 현황 조회
+    [설명] 장중 수집이 켜져 있으면 Close/ChangeRate 를 실시간 값으로 대체
     """
     try:
         query = text("""
@@ -33,7 +38,8 @@ def get_major_indices(db: Session = Depends(get_db)):
                             t.name        as "Name",
                             t.market_cap  as "MarketCap",
                             p.close       as "Close",
-                            p.change_rate as "ChangeRate"
+                            p.change_rate as "ChangeRate",
+                            p.date        as "Date"
                      FROM tickers t
                               JOIN prices p ON t.symbol = p.ticker_symbol
                      WHERE t.symbol IN ('^GSPC', '^DJI', '^IXIC')
@@ -46,7 +52,7 @@ def get_major_indices(db: Session = Depends(get_db)):
                      """)
 
         result = db.execute(query)
-        return result.mappings().all()
+        return intraday_store.overlay(result.mappings().all())
 
     except Exception as e:
         print(f"❌ [API Error] 지수 조회 실패: {e}")
@@ -61,6 +67,7 @@ def get_stock_ranking(limit: int = 100, db: Session = Depends(get_db)):
     """
     [기능] S&P 500 종목을 시가총액(Market Cap) 순으로 정렬하여 반환
     [설명] 지수(Index)는 제외하고, 활성화된(is_active=True) 종목만 조회
+    [설명] 장중 수집이 켜져 있으면 Close/ChangeRate 를 실시간 값으로 대체
     """
     try:
         query = text("""
@@ -68,7 +75,8 @@ def get_stock_ranking(limit: int = 100, db: Session = Depends(get_db)):
                             t.name        as "Name",
                             t.market_cap  as "MarketCap",
                             p.close       as "Close",
-                            p.change_rate as "ChangeRate"
+                            p.change_rate as "ChangeRate",
+                            p.date        as "Date"
                      FROM tickers t
                               JOIN prices p ON t.symbol = p.ticker_symbol
                      WHERE t.is_active = true
@@ -77,7 +85,7 @@ def get_stock_ranking(limit: int = 100, db: Session = Depends(get_db)):
                      """)
 
         result = db.execute(query, {"limit": limit})
-        return result.mappings().all()
+        return intraday_store.overlay(result.mappings().all())
 
     except Exception as e:
         print(f"❌ [API Error] 랭킹 조회 실패: {e}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Date, BigInteger, ForeignKey, Index, Boolean
+from sqlalchemy import Column, String, Float, Date, DateTime, Integer, BigInteger, ForeignKey, Index, Boolean
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
@@ -66,3 +66,59 @@ class Price(Base):
 
     def __repr__(self):
         return f"<Price(ticker='{self.ticker_symbol}', date='{self.date}', close={self.close})>"
+
+
+class IntradayPrice(Base):
+    """
+    [Transaction Table] 분봉 주가 (장중 실시간 수집)
+    - 일봉(prices)과 분리하여 저장, 인제스터가 배치 단위로 적재
+    """
+    __tablename__ = "intraday_prices"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    ticker_symbol = Column(String(10), ForeignKey("tickers.symbol"), index=True)
+    ts = Column(DateTime, index=True)  # 분봉 시작 시각 (거래소 현지 시각)
+
+    # OHLCV
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(BigInteger)
+
+    # 같은 분봉이 여러 번 갱신되어도 한 행만 유지 (Upsert 기준)
+    __table_args__ = (
+        Index('idx_intraday_ticker_ts', 'ticker_symbol', 'ts', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<IntradayPrice(ticker='{self.ticker_symbol}', ts='{self.ts}', close={self.close})>"
+
+
+class CollectJob(Base):
+    """
+    [Queue Table] 종목별 수집 작업 큐
+    - 여러 수집 워커가 SELECT ... FOR UPDATE SKIP LOCKED 로 작업을 나눠 가짐
+    - 리스(lease)가 만료된 running 작업은 다른 워커가 다시 가져감 (워커 장애 복구)
+    """
+    __tablename__ = "collect_jobs"
+
+    symbol = Column(String(10), primary_key=True)
+    status = Column(String(10), default="pending", nullable=False)  # pending / running / done / failed
+    attempts = Column(Integer, default=0, nullable=False)  # 시도 횟수 (재시도 한도 판단)
+
+    # 리스 정보 (누가, 언제까지 작업을 점유하는지)
+    worker_id = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    last_error = Column(String(500), nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+
+    # 워커가 가져갈 작업을 빠르게 찾기 위한 인덱스
+    __table_args__ = (
+        Index('idx_job_status_lease', 'status', 'lease_expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<CollectJob(symbol='{self.symbol}', status='{self.status}', worker='{self.worker_id}')>"
@@ -0,0 +1,12 @@
+# 데이터 소스별 심볼 표기 차이 보정 (S&P 500 리스트 -> yfinance/FDR)
+TICKER_EXCEPTIONS = {
+    'BRKB': 'BRK-B',
+    'BFB': 'BF-B'
+}
+
+# 수집할 미국 시장 지수 목록
+TARGET_INDICES = [
+    {'symbol': '^GSPC', 'name': 'S&P 500'},
+    {'symbol': '^DJI', 'name': 'Dow Jones 30'},
+    {'symbol': '^IXIC', 'name': 'NASDAQ Composite'}
+]
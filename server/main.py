@@ -1,11 +1,32 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from server.api.routes import router as stock_router
+from server.pipeline.intraday import create_ingestor_from_env
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    서버 시작/종료 시 장중 시세 인제스터 관리
+    - INTRADAY_MODE 환경변수가 설정된 경우에만 실행
+    - 워커가 여러 개여도 인제스터는 DB 잠금을 잡은 프로세스 하나에서만 실행
+    """
+    ingestor = create_ingestor_from_env()
+    if ingestor:
+        ingestor.start()
+
+    yield
+
+    if ingestor:
+        ingestor.stop()
+
 
 app = FastAPI(
     title="Ticker API",
     description="주식 데이터 분석 및 제공 API",
-    version="0.0.1"
+    version="0.0.1",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -2,10 +2,15 @@ import FinanceDataReader as fdr
 import yfinance as yf
 import pandas as pd
 import time
+import os
+import socket
+import argparse
 from datetime import datetime, timedelta
 from sqlalchemy.orm import sessionmaker, scoped_session
 from server.core.database import engine, init_db
 from server.core.models import Ticker, Price
+from server.core.symbols import TARGET_INDICES, TICKER_EXCEPTIONS
+from server.pipeline.work_queue import WorkQueue
 
 # 전역 세션 팩토리 생성 (스레드 안전성 확보)
 session_factory = sessionmaker(bind=engine)
@@ -17,13 +22,11 @@ class StockCollector:
     S&P 500 주가 데이터 수집 및 관리 파이프라인
     - Ticker 동기화: yfinance
     - Price 수집: FinanceDataReader
+    - 분산 수집: collect_jobs 작업 큐를 여러 워커(프로세스/호스트)가 나눠서 처리
     """
 
     def __init__(self):
-        self.ticker_exceptions = {
-            'BRKB': 'BRK-B',
-            'BFB': 'BF-B'
-        }
+        self.ticker_exceptions = TICKER_EXCEPTIONS
 
     def _get_session(self):
         """DB 세션 생성 (Context Management)"""
@@ -102,9 +105,11 @@ class StockCollector:
         finally:
             session.close()
 
-    def process_prices(self, symbol, days=365 * 2):
+    def process_prices(self, symbol, days=365 * 2, raise_errors=False):
         """
         2. 개별 종목 주가 데이터 수집 및 가공
+        - 성공 여부를 반환
+        - raise_errors=True 이면 실패 시 예외를 그대로 전달 (작업 큐에 실패 원인 기록용)
         """
         session = self._get_session()
         search_symbol = self.ticker_exceptions.get(symbol, symbol)
@@ -121,7 +126,7 @@ class StockCollector:
             df = fdr.DataReader(search_symbol, start_date, end_date)
             if df.empty:
                 session.commit()  # 삭제 내역만 커밋하고 종료
-                return
+                return True
 
             # 3. 기술적 지표 계산 (Pandas Vectorization)
             # 등락률 (FutureWarning 해결: fill_method=None)
@@ -163,96 +168,169 @@ class StockCollector:
             session.add_all(prices_to_add)
             session.commit()
             # print(f"💾 [{symbol}] 데이터 갱신 완료 ({len(prices_to_add)}일)")
+            return True
 
         except Exception as e:
             session.rollback()
             print(f"❌ [{symbol}] 가격 수집 실패: {e}")
+            if raise_errors:
+                raise
+            return False
         finally:
             session.close()
 
-    def run(self, limit=None):
+    def sync_indices(self):
         """
-        전체 파이프라인 실행 함수
+        1.5 지수용 Ticker 생성/업데이트
+        - 지수 주가는 일반 종목과 함께 작업 큐에 등록되어 수집됨
         """
-        print("🚀 Stock Collector Pipeline Started...")
-
-        # 1. DB 테이블 초기화 (없으면 생성)
-        init_db()
-
-        # 2. 종목 정보 동기화
-        symbols = self.sync_metadata()
-
-        # ---------------------------------------------------------
-        # 📊 Phase 1.5: 미국 시장 지수 수집 (S&P500, Dow, Nasdaq)
-        # ---------------------------------------------------------
-        print("\n" + "=" * 50)
-        print("📊 Phase 1.5: 주요 시장 지수(Indices) 수집")
-        print("=" * 50)
-
-        # 수집할 지수 목록 정의
-        TARGET_INDICES = [
-            {'symbol': '^GSPC', 'name': 'S&P 500'},
-            {'symbol': '^DJI', 'name': 'Dow Jones 30'},
-            {'symbol': '^IXIC', 'name': 'NASDAQ Composite'}
-        ]
-
         session = self._get_session()
         try:
             for idx in TARGET_INDICES:
-                symbol = idx['symbol']
-                name = idx['name']
-
-                # 지수용 Ticker 생성/업데이트
-                idx_ticker = Ticker(
-                    symbol=symbol,
-                    name=name,
+                session.merge(Ticker(
+                    symbol=idx['symbol'],
+                    name=idx['name'],
                     sector="Index",
                     industry="Market",
                     market_cap=0,
                     is_active=False
-                )
-                session.merge(idx_ticker)
-                session.commit()
-
-                # 주가 수집 실행
-                print(f"   Processing Index: {name} ({symbol})...", end='\r', flush=True)
-                self.process_prices(symbol)
-                print(f"✅ 지수 수집 완료: {name:<20}       ")
+                ))
+            session.commit()
+            return [idx['symbol'] for idx in TARGET_INDICES]
 
         except Exception as e:
-            print(f"❌ 지수 수집 실패: {e}")
+            session.rollback()
+            print(f"❌ 지수 정보 등록 실패: {e}")
+            return []
         finally:
             session.close()
 
+    def enqueue(self, limit=None, queue=None):
+        """
+        작업 큐 등록 (코디네이터 역할)
+        - 메타데이터/지수 동기화 후 수집 대상 종목을 collect_jobs 에 등록
+        - 워커가 몇 개든 등록은 한 번만 실행
+        - 등록한 종목 리스트를 반환
+        """
+        queue = queue or WorkQueue()
+
+        # 1. DB 테이블 초기화 (없으면 생성)
+        init_db()
+
+        # 2. 종목 정보 동기화
+        symbols = self.sync_metadata()
+
+        print("\n" + "=" * 50)
+        print("📊 Phase 1.5: 주요 시장 지수(Indices) 등록")
+        print("=" * 50)
+        indices = self.sync_indices()
+
         if not symbols:
-            print("❌ 종목 리스트를 가져오지 못해 종료합니다.")
-            return
+            print("❌ 종목 리스트를 가져오지 못해 지수만 등록합니다.")
 
         # 수집 대상 설정
-        target_symbols = symbols[:limit] if limit else symbols
-        total = len(target_symbols)
+        target_symbols = indices + (symbols[:limit] if limit else symbols)
+        count = queue.enqueue(target_symbols)
+
+        print(f"✅ 작업 큐 등록 완료: {count}개 (지수 {len(indices)}개 포함)")
+        return target_symbols
+
+    def run_worker(self, worker_id=None, queue=None, batch_size=10, poll_interval=5.0, exit_when_empty=True,
+                   symbols=None):
+        """
+        수집 워커 실행
+        - 작업 큐에서 batch_size 개씩 리스를 잡고 주가를 수집
+        - 워커 수를 늘리면 수집 처리량이 수평 확장됨
+        - exit_when_empty=False 이면 큐가 비어도 대기하며 새 작업을 기다림
+        - symbols 를 지정하면 해당 종목 작업만 처리
+        """
+        queue = queue or WorkQueue()
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+
+        # 작업 등록(enqueue)보다 워커가 먼저 떠도 collect_jobs 테이블이 있도록 보장
+        init_db()
 
         print("\n" + "=" * 50)
-        print(f"💾 Phase 2: 주가 데이터 수집 시작 (대상: {total}개)")
+        print(f"💾 Phase 2: 주가 데이터 수집 워커 시작 ({worker_id})")
         print("=" * 50)
 
-        # 3. 주가 수집 루프
         start_time = time.time()
-        for i, symbol in enumerate(target_symbols):
-            # 진행률 바 표시
-            progress = (i + 1) / total * 100
-            elapsed = time.time() - start_time
-            print(f"[{i + 1}/{total}] {symbol:<5} |{'█' * int(progress / 2):<50}| {progress:.1f}% ({elapsed:.1f}s)",
-                  end='\r', flush=True)
+        done_count = 0
+        failed_count = 0
+        lost_count = 0
+
+        while True:
+            claimed = queue.claim(worker_id, batch_size=batch_size, symbols=symbols)
+
+            if not claimed:
+                if exit_when_empty:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            for symbol in claimed:
+                elapsed = time.time() - start_time
+                print(f"[{worker_id}] {symbol:<6} | 완료 {done_count} / 실패 {failed_count} ({elapsed:.1f}s)",
+                      end='\r', flush=True)
+
+                # 처리 직전에 리스 연장 (그 사이 다른 워커가 가져갔으면 건너뜀)
+                if not queue.renew(symbol, worker_id):
+                    print(f"\n⚠️ [{symbol}] 리스 만료로 다른 워커에 넘어가 건너뜀")
+                    lost_count += 1
+                    continue
 
-            self.process_prices(symbol)
-            # API 과부하 방지
-            time.sleep(0.1)
+                try:
+                    self.process_prices(symbol, raise_errors=True)
+                    finished = queue.complete(symbol, worker_id)
+                    if finished:
+                        done_count += 1
+                except Exception as e:
+                    finished = queue.fail(symbol, worker_id, error=str(e))
+                    if finished:
+                        failed_count += 1
+
+                if not finished:
+                    print(f"\n⚠️ [{symbol}] 처리 중 리스를 잃어 결과를 반영하지 못함")
+                    lost_count += 1
+
+                # API 과부하 방지
+                time.sleep(0.1)
+
+        print(f"\n\n✅ 워커 작업 종료! (완료 {done_count}개, 실패 {failed_count}개, 리스 상실 {lost_count}개, "
+              f"총 소요시간: {time.time() - start_time:.1f}초)")
+        print(f"📋 작업 큐 현황: {queue.stats()}")
+
+    def run(self, limit=None):
+        """
+        전체 파이프라인 실행 함수
+        - 단일 프로세스 실행: 작업 큐 등록 후 워커 하나로 처리
+        - 이번에 등록한 종목만 처리 (이전에 남은 작업은 별도 워커가 처리)
+        """
+        print("🚀 Stock Collector Pipeline Started...")
 
-        print(f"\n\n✅ 모든 수집 작업이 완료되었습니다! (총 소요시간: {time.time() - start_time:.1f}초)")
+        queue = WorkQueue()
+        symbols = self.enqueue(limit=limit, queue=queue)
+        self.run_worker(queue=queue, symbols=symbols)
 
 
 if __name__ == "__main__":
+    # 사용 예시
+    # - 단일 실행:    python -m server.pipeline.collector all --limit 1
+    # - 작업 등록:    python -m server.pipeline.collector enqueue
+    # - 워커 실행:    python -m server.pipeline.collector worker  (여러 프로세스/호스트에서 동시 실행 가능)
+    parser = argparse.ArgumentParser(description="Ticker 주가 수집 파이프라인")
+    parser.add_argument("mode", nargs="?", choices=["all", "enqueue", "worker"], default="all")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="수집 대상 종목 수 제한 (all 모드 기본값: 1, enqueue 모드 기본값: 전체)")
+    parser.add_argument("--batch-size", type=int, default=10, help="워커가 한 번에 점유할 작업 수")
+    parser.add_argument("--wait", action="store_true", help="큐가 비어도 종료하지 않고 새 작업 대기")
+    args = parser.parse_args()
+
     collector = StockCollector()
 
-    collector.run(limit=1)
+    if args.mode == "enqueue":
+        collector.enqueue(limit=args.limit)
+    elif args.mode == "worker":
+        collector.run_worker(batch_size=args.batch_size, exit_when_empty=not args.wait)
+    else:
+        collector.run(limit=args.limit if args.limit is not None else 1)
@@ -0,0 +1,514 @@
+import os
+import time
+import argparse
+import threading
+from collections import namedtuple
+import pandas as pd
+import yfinance as yf
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from server.core.database import SessionLocal, engine, init_db
+from server.core.models import IntradayPrice, Ticker
+from server.core.symbols import TARGET_INDICES, TICKER_EXCEPTIONS
+
+# 분봉 시각 기준 타임존 (미국 거래소)
+EXCHANGE_TZ = "America/New_York"
+
+# 여러 API 프로세스 중 한 곳에서만 인제스터를 실행하기 위한 Postgres advisory lock 키
+INGESTOR_LOCK_KEY = 7_261_001
+
+# 분봉 데이터 (ts: 분봉 시작 시각, 거래소 현지 시각 기준 naive datetime)
+Bar = namedtuple("Bar", ["symbol", "ts", "open", "high", "low", "close", "volume"])
+
+
+class RingBuffer:
+    """
+    고정 크기 링 버퍼
+    - 미리 할당한 슬롯을 순환하며 덮어쓰므로 메모리 사용량이 일정
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._items = [None] * size
+        self._head = 0  # 다음에 쓸 위치
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, item):
+        self._items[self._head] = item
+        self._head = (self._head + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def replace_latest(self, item):
+        """가장 최근 항목 덮어쓰기 (형성 중인 분봉 갱신용)"""
+        if self._count == 0:
+            self.append(item)
+        else:
+            self._items[(self._head - 1) % self.size] = item
+
+    def latest(self):
+        if self._count == 0:
+            return None
+        return self._items[(self._head - 1) % self.size]
+
+    def items(self):
+        """오래된 순서로 반환"""
+        start = (self._head - self._count) % self.size
+        return [self._items[(start + i) % self.size] for i in range(self._count)]
+
+
+class IntradayStore:
+    """
+    장중 시세 인메모리 저장소
+    - 종목별 최근 N개 분봉을 링 버퍼에 보관
+    - 전일 종가 대비 등락률을 계산하여 API(랭킹/지수)에 실시간 값 제공
+    """
+
+    def __init__(self, size=390):
+        self.size = size  # 기본값: 정규장 1일치 분봉 (6.5시간)
+        self._buffers = {}
+        self._prev_close = {}
+        self._lock = threading.Lock()
+
+    def set_prev_close(self, prev_close):
+        with self._lock:
+            self._prev_close = dict(prev_close)
+
+    def push(self, bar):
+        """
+        분봉 추가
+        - 같은 시각의 분봉이면 덮어쓰고, 이미 지난 분봉이면 무시
+        - 반영 여부를 반환
+        """
+        with self._lock:
+            buffer = self._buffers.get(bar.symbol)
+            if buffer is None:
+                buffer = self._buffers[bar.symbol] = RingBuffer(self.size)
+
+            latest = buffer.latest()
+            if latest is not None and bar.ts < latest.ts:
+                return False
+            if latest is not None and bar.ts == latest.ts:
+                buffer.replace_latest(bar)
+            else:
+                buffer.append(bar)
+            return True
+
+    def bars(self, symbol):
+        with self._lock:
+            buffer = self._buffers.get(symbol)
+            return buffer.items() if buffer else []
+
+    def quote(self, symbol, since=None):
+        """
+        최신 종가와 전일 대비 등락률(%) 조회
+        - 데이터가 없거나, 최신 분봉이 since(일봉 날짜)보다 이전이면 None
+        - 전일 종가를 모르면 ChangeRate 는 None
+        """
+        with self._lock:
+            buffer = self._buffers.get(symbol)
+            latest = buffer.latest() if buffer else None
+            if latest is None:
+                return None
+            if since is not None and latest.ts.date() < since:
+                return None
+
+            prev_close = self._prev_close.get(symbol)
+            change_rate = (latest.close / prev_close - 1) * 100 if prev_close else None
+            return {"Close": latest.close, "ChangeRate": change_rate, "Date": latest.ts.date()}
+
+    def overlay(self, rows):
+        """
+        DB 조회 결과(일봉 기준)에 장중 실시간 Close/ChangeRate 덮어쓰기
+        - 장중 데이터가 없거나 DB 일봉(Date)보다 오래된 종목은 DB 값을 그대로 사용
+        - 전일 종가를 모르면 DB 일봉이 이전 거래일일 때만 그 종가를 기준으로 등락률 계산
+          (그렇지 않으면 Close/ChangeRate 짝이 어긋나므로 DB 값을 그대로 사용)
+        """
+        result = []
+        for row in rows:
+            row = dict(row)
+            quote = self.quote(row["Symbol"], since=row.get("Date"))
+
+            if quote and quote["ChangeRate"] is None:
+                daily_date, daily_close = row.get("Date"), row.get("Close")
+                if daily_date is not None and daily_date < quote["Date"] and daily_close:
+                    quote["ChangeRate"] = (quote["Close"] / daily_close - 1) * 100
+                else:
+                    quote = None
+
+            if quote:
+                row["Close"] = quote["Close"]
+                row["ChangeRate"] = quote["ChangeRate"]
+            result.append(row)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._buffers.clear()
+            self._prev_close.clear()
+
+
+# 전역 저장소 (API 프로세스 안에서 인제스터와 라우터가 공유)
+intraday_store = IntradayStore(size=int(os.getenv("INTRADAY_BUFFER_SIZE", "390")))
+
+
+class YFinanceFeed:
+    """
+    yfinance 1분봉 폴링 피드
+    - 첫 호출은 당일 분봉 전체, 이후에는 마지막으로 받은 분봉 시각부터 증분 조회
+    - 마지막 분봉은 형성 중일 수 있으므로 다시 받아 저장소에서 덮어씀
+    """
+
+    def __init__(self, symbols):
+        # yfinance 심볼 -> DB 심볼
+        self.symbol_map = {TICKER_EXCEPTIONS.get(s, s): s for s in symbols}
+        self.exhausted = False  # 실시간 피드는 끝나지 않음
+        self._last_ts = {}  # 종목별 마지막으로 받은 분봉 시각
+
+    def poll(self):
+        if self._last_ts:
+            # 가장 뒤처진 종목 기준으로 조회해야 누락이 없음
+            start = pd.Timestamp(min(self._last_ts.values())).tz_localize(EXCHANGE_TZ)
+            period = {"start": start}
+        else:
+            period = {"period": "1d"}
+
+        df = yf.download(
+            list(self.symbol_map), interval="1m",
+            group_by="ticker", progress=False, threads=True, **period
+        )
+        if df is None or df.empty:
+            return []
+
+        bars = []
+        for yf_symbol, symbol in self.symbol_map.items():
+            if yf_symbol not in df.columns.get_level_values(0):
+                continue
+
+            sub = df[yf_symbol].dropna(subset=["Close"])
+            if sub.empty:
+                continue
+
+            # 타임존 제거 (거래소 현지 시각 기준으로 저장)
+            index = sub.index.tz_localize(None) if sub.index.tz is not None else sub.index
+            for ts, row in zip(index, sub.itertuples()):
+                bars.append(Bar(
+                    symbol=symbol,
+                    ts=ts.to_pydatetime(),
+                    open=float(row.Open),
+                    high=float(row.High),
+                    low=float(row.Low),
+                    close=float(row.Close),
+                    volume=int(row.Volume) if pd.notna(row.Volume) else 0
+                ))
+            self._last_ts[symbol] = index[-1].to_pydatetime()
+        return bars
+
+
+class ReplayFeed:
+    """
+    로컬 CSV 리플레이 피드 (테스트/개발용)
+    - 컬럼: Symbol, Datetime, Open, High, Low, Close, Volume
+    - poll() 한 번에 한 분(같은 Datetime)씩 재생
+    """
+
+    def __init__(self, path):
+        df = pd.read_csv(path, parse_dates=["Datetime"]).sort_values("Datetime")
+        self._groups = iter(df.groupby("Datetime", sort=True))
+        self.exhausted = False
+
+    def poll(self):
+        try:
+            ts, group = next(self._groups)
+        except StopIteration:
+            self.exhausted = True
+            return []
+
+        return [
+            Bar(
+                symbol=row.Symbol,
+                ts=ts.to_pydatetime(),
+                open=float(row.Open),
+                high=float(row.High),
+                low=float(row.Low),
+                close=float(row.Close),
+                volume=int(row.Volume)
+            )
+            for row in group.itertuples()
+        ]
+
+
+class IntradayIngestor:
+    """
+    장중 시세 수집기 (백그라운드 스레드)
+    - 피드에서 분봉을 받아 링 버퍼에 반영
+    - intraday_prices 테이블에는 flush_size/flush_interval 단위로 모아서 일괄 저장
+    - prev_close_loader: 날짜를 받아 {종목: 전일 종가} 를 반환 (기본값: prices 테이블 조회)
+    - session_factory=None 이면 DB 적재를 생략 (로컬 리플레이/테스트용)
+    - lock_conn: 단독 실행 보장용 advisory lock 연결 (stop() 에서 반납)
+    """
+
+    def __init__(self, feed, store=intraday_store, session_factory=SessionLocal, prev_close_loader=None,
+                 poll_interval=60.0, flush_size=500, flush_interval=30.0, join_timeout=10.0, lock_conn=None):
+        self.feed = feed
+        self.store = store
+        self.session_factory = session_factory
+        self.prev_close_loader = prev_close_loader or self._load_prev_close
+        self.poll_interval = poll_interval
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.join_timeout = join_timeout
+        self.lock_conn = lock_conn
+
+        self._pending = {}  # (symbol, ts) -> Bar, 같은 분봉은 최신 값만 저장
+        self._last_flush = time.time()
+        self._session_day = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="intraday-ingestor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        try:
+            if self._thread:
+                # yfinance 요청이 멈춰 있어도 서버 종료가 막히지 않도록 제한 시간만 대기
+                self._thread.join(timeout=self.join_timeout)
+                if self._thread.is_alive():
+                    print("⚠️ [Intraday] 인제스터 종료 대기 시간 초과 (미저장 분봉은 유실될 수 있음)")
+                    return
+            self.flush()
+        finally:
+            if self.lock_conn is not None:
+                release_ingestor_lock(self.lock_conn)
+                self.lock_conn = None
+
+    def run(self):
+        print("📈 Intraday Ingestor Started...")
+        while not self._stop.is_set() and not self.feed.exhausted:
+            try:
+                self.ingest(self.feed.poll())
+
+                if len(self._pending) >= self.flush_size or time.time() - self._last_flush >= self.flush_interval:
+                    self.flush()
+
+            except Exception as e:
+                # 일시적인 네트워크/DB 오류는 로그만 남기고 다음 주기에 재시도
+                print(f"❌ [Intraday] 수집 실패: {e}")
+
+            self._stop.wait(self.poll_interval)
+
+        self.flush()
+        print("✅ Intraday Ingestor Stopped.")
+
+    def ingest(self, bars):
+        """
+        분봉 목록을 저장소에 반영하고 DB 적재 대기열에 추가
+        - 전일 종가 조회에 실패해도 분봉은 계속 반영 (등락률만 다음 재시도 전까지 비어 있음)
+        """
+        failed_day = None
+        for bar in bars:
+            # 날짜가 바뀌면 전일 종가 갱신 (등락률 기준)
+            # 조회에 실패하면 날짜를 갱신하지 않아 다음 폴링에서 다시 시도
+            day = bar.ts.date()
+            if day != self._session_day and day != failed_day:
+                try:
+                    self.store.set_prev_close(self.prev_close_loader(day))
+                    self._session_day = day
+                except Exception as e:
+                    print(f"❌ [Intraday] 전일 종가 조회 실패 ({day}): {e}")
+                    # 이전 날짜 기준 종가로 등락률을 계산하지 않도록 비움
+                    self.store.set_prev_close({})
+                    failed_day = day
+
+            if self.store.push(bar):
+                self._pending[(bar.symbol, bar.ts)] = bar
+
+    def flush(self):
+        """대기 중인 분봉 일괄 저장 (Upsert)"""
+        self._last_flush = time.time()
+        if not self._pending:
+            return
+
+        if self.session_factory is None:
+            self._pending = {}
+            return
+
+        pending = self._pending
+        self._pending = {}
+
+        session = self.session_factory()
+        try:
+            # tickers 에 없는 종목은 FK 위반으로 전체 트랜잭션을 실패시키므로 제외
+            symbols = {symbol for symbol, _ in pending}
+            known = {row.symbol for row in session.query(Ticker.symbol).filter(Ticker.symbol.in_(symbols))}
+            unknown = symbols - known
+            if unknown:
+                print(f"⚠️ [Intraday] 등록되지 않은 종목 분봉 제외: {sorted(unknown)}")
+
+            bars = [bar for bar in pending.values() if bar.symbol in known]
+
+            # 첫 폴링은 당일 분봉 전체가 들어오므로 flush_size 단위로 나눠서 저장
+            for i in range(0, len(bars), self.flush_size):
+                stmt = insert(IntradayPrice).values([
+                    {
+                        "ticker_symbol": bar.symbol,
+                        "ts": bar.ts,
+                        "open": bar.open,
+                        "high": bar.high,
+                        "low": bar.low,
+                        "close": bar.close,
+                        "volume": bar.volume,
+                    }
+                    for bar in bars[i:i + self.flush_size]
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[IntradayPrice.ticker_symbol, IntradayPrice.ts],
+                    set_={
+                        "open": stmt.excluded.open,
+                        "high": stmt.excluded.high,
+                        "low": stmt.excluded.low,
+                        "close": stmt.excluded.close,
+                        "volume": stmt.excluded.volume,
+                    }
+                )
+                session.execute(stmt)
+            session.commit()
+
+        except Exception as e:
+            session.rollback()
+            print(f"❌ [Intraday] 분봉 저장 실패 ({len(pending)}건, 다음 주기에 재시도): {e}")
+
+            # 실패한 분봉을 대기열에 되돌림 (그 사이 갱신된 같은 분봉은 최신 값 유지)
+            self._pending = {**pending, **self._pending}
+        finally:
+            session.close()
+
+    def _load_prev_close(self, day):
+        """해당 날짜 이전의 마지막 일봉 종가 조회"""
+        session = self.session_factory()
+        try:
+            query = text("""
+                         SELECT DISTINCT ON (ticker_symbol) ticker_symbol, close
+                         FROM prices
+                         WHERE date < :day
+                         ORDER BY ticker_symbol, date DESC
+                         """)
+            rows = session.execute(query, {"day": day}).all()
+            return {symbol: close for symbol, close in rows}
+        finally:
+            session.close()
+
+
+def load_tracked_symbols(limit=None):
+    """
+    장중 수집 대상 종목 조회
+    - 시가총액 상위 활성 종목 + 주요 지수
+    """
+    session = SessionLocal()
+    try:
+        query = text("""
+                     SELECT symbol
+                     FROM tickers
+                     WHERE is_active = true
+                     ORDER BY market_cap DESC NULLS LAST
+                     """ + (" LIMIT :limit" if limit else ""))
+        symbols = session.execute(query, {"limit": limit}).scalars().all()
+        return [idx['symbol'] for idx in TARGET_INDICES] + list(symbols)
+    finally:
+        session.close()
+
+
+def acquire_ingestor_lock(bind=engine):
+    """
+    인제스터 단독 실행 잠금 획득 (Postgres session-level advisory lock)
+    - 이미 다른 프로세스/호스트가 잡고 있으면 None
+    - 잠금은 반환된 연결이 살아 있는 동안 유지 (프로세스가 죽으면 자동 해제)
+    """
+    conn = bind.connect()
+    try:
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": INGESTOR_LOCK_KEY}).scalar()
+        conn.commit()
+    except Exception:
+        conn.close()
+        raise
+
+    if not acquired:
+        conn.close()
+        return None
+    return conn
+
+
+def release_ingestor_lock(conn):
+    """잠금 해제 (풀에 반납된 연결에 잠금이 남지 않도록 명시적으로 해제)"""
+    try:
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": INGESTOR_LOCK_KEY})
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def create_ingestor_from_env():
+    """
+    환경변수로 인제스터 생성 (API 서버 시작 시 사용)
+    - 여러 프로세스(uvicorn --workers N)가 떠도 advisory lock 으로 인제스터는 하나만 실행
+    - 링 버퍼는 프로세스 메모리에 있으므로 실시간 값은 인제스터가 도는 프로세스만 제공
+      → INTRADAY_MODE 사용 시 API 는 단일 워커로 실행할 것
+    - INTRADAY_MODE: poll (yfinance 폴링) / replay (로컬 CSV 재생), 미설정 시 비활성화
+    - INTRADAY_REPLAY_PATH: replay 모드의 CSV 경로
+    - INTRADAY_POLL_INTERVAL: 폴링 주기 (초)
+    - INTRADAY_SYMBOL_LIMIT: 수집 종목 수 제한 (시가총액 순)
+    """
+    mode = os.getenv("INTRADAY_MODE")
+    if not mode:
+        return None
+
+    if mode not in ("replay", "poll"):
+        raise ValueError(f"지원하지 않는 INTRADAY_MODE: {mode}")
+
+    poll_interval = float(os.getenv("INTRADAY_POLL_INTERVAL", "60"))
+
+    # 테이블 준비 (빈 DB 에서 종목 조회/분봉 적재가 실패하지 않도록 먼저 실행)
+    init_db()
+
+    lock_conn = acquire_ingestor_lock()
+    if lock_conn is None:
+        print("ℹ️ [Intraday] 다른 프로세스에서 인제스터가 실행 중이라 이 프로세스는 건너뜁니다.")
+        return None
+
+    try:
+        if mode == "replay":
+            feed = ReplayFeed(os.environ["INTRADAY_REPLAY_PATH"])
+        else:
+            limit = os.getenv("INTRADAY_SYMBOL_LIMIT")
+            feed = YFinanceFeed(load_tracked_symbols(int(limit) if limit else None))
+    except Exception:
+        release_ingestor_lock(lock_conn)
+        raise
+
+    return IntradayIngestor(feed, poll_interval=poll_interval, lock_conn=lock_conn)
+
+
+if __name__ == "__main__":
+    # 로컬 리플레이 확인용
+    # python -m server.pipeline.intraday sample.csv --interval 0 [--no-db]
+    parser = argparse.ArgumentParser(description="장중 분봉 리플레이")
+    parser.add_argument("path", help="리플레이 CSV 경로 (Symbol, Datetime, Open, High, Low, Close, Volume)")
+    parser.add_argument("--interval", type=float, default=0.0, help="분봉 간 재생 간격 (초)")
+    parser.add_argument("--no-db", action="store_true", help="DB 없이 재생 (전일 종가/분봉 적재 생략)")
+    args = parser.parse_args()
+
+    if args.no_db:
+        ingestor = IntradayIngestor(ReplayFeed(args.path), session_factory=None,
+                                    prev_close_loader=lambda day: {}, poll_interval=args.interval)
+    else:
+        init_db()
+        ingestor = IntradayIngestor(ReplayFeed(args.path), poll_interval=args.interval)
+    ingestor.run()
+
+    for idx in TARGET_INDICES:
+        print(f"   {idx['name']:<20} {intraday_store.quote(idx['symbol'])}")
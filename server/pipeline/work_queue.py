@@ -0,0 +1,178 @@
+from datetime import timedelta
+from sqlalchemy import and_, or_, case, func
+from sqlalchemy.dialects.postgresql import insert
+from server.core.database import SessionLocal
+from server.core.models import CollectJob
+
+
+class WorkQueue:
+    """
+    DB 기반 종목 수집 작업 큐 (collect_jobs 테이블)
+    - 작업 점유: SELECT ... FOR UPDATE SKIP LOCKED (워커끼리 같은 행을 두고 대기하지 않음)
+    - 리스 만료: 워커가 죽어서 running 상태로 남은 작업은 만료 후 다른 워커가 회수
+    - 시간 기준은 DB 서버 시각 (여러 호스트 간 시계 오차 방지)
+    """
+
+    def __init__(self, session_factory=SessionLocal, lease_seconds=300, max_attempts=3):
+        self.session_factory = session_factory
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+
+    def enqueue(self, symbols):
+        """
+        작업 등록 (Upsert)
+        - 이미 있는 종목은 pending 으로 되돌리고 시도 횟수를 초기화
+        - 단, 다른 워커가 리스를 유지 중인 running 작업은 건드리지 않음
+        - 실제로 등록/초기화된 작업 수를 반환
+        """
+        if not symbols:
+            return 0
+
+        session = self.session_factory()
+        try:
+            # 중복 종목 제거 (같은 INSERT 안에서 ON CONFLICT 가 두 번 걸리면 에러)
+            rows = [{"symbol": s, "status": "pending", "attempts": 0} for s in dict.fromkeys(symbols)]
+
+            stmt = insert(CollectJob).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CollectJob.symbol],
+                set_={
+                    "status": "pending",
+                    "attempts": 0,
+                    "worker_id": None,
+                    "lease_expires_at": None,
+                    "last_error": None,
+                    "updated_at": func.localtimestamp(),
+                },
+                where=~and_(
+                    CollectJob.status == "running",
+                    CollectJob.lease_expires_at >= func.localtimestamp()
+                )
+            )
+            result = session.execute(stmt)
+            session.commit()
+            return result.rowcount
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def claim(self, worker_id, batch_size=10, symbols=None):
+        """
+        작업 점유 (리스 획득)
+        - pending 작업 또는 리스가 만료된 running 작업을 최대 batch_size 개 가져옴
+        - 다른 워커가 잠근 행은 건너뜀 (SKIP LOCKED)
+        - symbols 를 지정하면 해당 종목 작업만 가져옴
+        """
+        session = self.session_factory()
+        try:
+            now = func.localtimestamp()
+
+            # 재시도 한도를 다 쓴 채로 리스가 만료된 작업은 회수하지 않고 failed 로 확정
+            session.query(CollectJob).filter(
+                CollectJob.status == "running",
+                CollectJob.lease_expires_at < now,
+                CollectJob.attempts >= self.max_attempts
+            ).update(
+                {"status": "failed", "lease_expires_at": None, "updated_at": now,
+                 "last_error": "lease expired"},
+                synchronize_session=False
+            )
+
+            query = session.query(CollectJob)
+            if symbols is not None:
+                query = query.filter(CollectJob.symbol.in_(symbols))
+
+            jobs = (
+                query
+                .filter(
+                    or_(
+                        CollectJob.status == "pending",
+                        and_(CollectJob.status == "running", CollectJob.lease_expires_at < now)
+                    ),
+                    CollectJob.attempts < self.max_attempts
+                )
+                .order_by(CollectJob.symbol)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+
+            claimed = []
+            for job in jobs:
+                job.status = "running"
+                job.worker_id = worker_id
+                job.attempts += 1
+                job.lease_expires_at = now + self.lease
+                job.updated_at = now
+                claimed.append(job.symbol)
+
+            session.commit()
+            return claimed
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def renew(self, symbol, worker_id):
+        """
+        리스 연장 (종목 처리 직전에 호출)
+        - 배치 뒤쪽 작업이 앞 작업을 처리하는 동안 만료되는 것을 방지
+        - 이미 다른 워커가 가져간 작업이면 False
+        """
+        now = func.localtimestamp()
+        return self._finish(symbol, worker_id, {"lease_expires_at": now + self.lease})
+
+    def complete(self, symbol, worker_id):
+        """작업 완료 처리 (리스를 보유한 워커만 가능)"""
+        return self._finish(symbol, worker_id, {"status": "done", "last_error": None})
+
+    def fail(self, symbol, worker_id, error=None):
+        """
+        작업 실패 처리
+        - 재시도 한도 이내면 pending 으로 되돌려 다른 워커가 다시 시도
+        - 한도를 넘기면 failed 로 확정
+        """
+        return self._finish(symbol, worker_id, {
+            "status": case((CollectJob.attempts >= self.max_attempts, "failed"), else_="pending"),
+            "last_error": str(error)[:500] if error else None,
+        })
+
+    def _finish(self, symbol, worker_id, values):
+        """
+        리스를 보유한 작업 갱신 (반납/연장 공통)
+        - 리스가 만료되어 다른 워커가 이미 가져간 작업이면 아무것도 바꾸지 않음 (False 반환)
+        - values 에 lease_expires_at 이 없으면 리스 반납으로 간주
+        """
+        session = self.session_factory()
+        try:
+            updated = (
+                session.query(CollectJob)
+                .filter(
+                    CollectJob.symbol == symbol,
+                    CollectJob.worker_id == worker_id,
+                    CollectJob.status == "running"
+                )
+                .update(
+                    {"lease_expires_at": None, **values, "updated_at": func.localtimestamp()},
+                    synchronize_session=False
+                )
+            )
+            session.commit()
+            return updated > 0
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def stats(self):
+        """상태별 작업 개수 조회 (진행률 표시용)"""
+        session = self.session_factory()
+        try:
+            rows = session.query(CollectJob.status, func.count()).group_by(CollectJob.status).all()
+            return {status: count for status, count in rows}
+        finally:
+            session.close()
@@ -0,0 +1,302 @@
+import os
+from collections import namedtuple
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+
+from server.pipeline import intraday
+from server.pipeline.intraday import (
+    Bar,
+    IntradayIngestor,
+    IntradayStore,
+    ReplayFeed,
+    YFinanceFeed,
+    acquire_ingestor_lock,
+    release_ingestor_lock,
+)
+
+REPLAY_CSV = """Symbol,Datetime,Open,High,Low,Close,Volume
+AAA,2026-10-19 09:30:00,100,101,99,100.5,1000
+^GSPC,2026-10-19 09:30:00,5000,5001,4999,5000.0,0
+AAA,2026-10-19 09:31:00,100.5,102,100,101.0,1200
+AAA,2026-10-19 09:32:00,101,103,101,102.0,900
+AAA,2026-10-19 09:33:00,102,104,102,103.0,800
+AAA,2026-10-19 09:33:00,102,105,102,104.0,850
+"""
+
+
+def replay(ingestor):
+    while not ingestor.feed.exhausted:
+        ingestor.ingest(ingestor.feed.poll())
+
+
+@pytest.fixture
+def ingestor(tmp_path):
+    path = tmp_path / "replay.csv"
+    path.write_text(REPLAY_CSV)
+
+    return IntradayIngestor(
+        ReplayFeed(path),
+        store=IntradayStore(size=3),
+        session_factory=None,
+        prev_close_loader=lambda day: {"AAA": 100.0},
+    )
+
+
+def test_ring_buffer_wraps_at_size(ingestor):
+    replay(ingestor)
+
+    bars = ingestor.store.bars("AAA")
+    assert len(bars) == 3
+    assert [bar.ts.minute for bar in bars] == [31, 32, 33]
+
+
+def test_same_minute_bar_is_replaced(ingestor):
+    replay(ingestor)
+
+    latest = ingestor.store.bars("AAA")[-1]
+    assert latest.close == 104.0
+    assert ingestor._pending[("AAA", latest.ts)].close == 104.0
+
+
+def test_out_of_order_bar_is_rejected(ingestor):
+    replay(ingestor)
+
+    stale = Bar("AAA", datetime(2026, 10, 19, 9, 32), 1, 1, 1, 1.0, 1)
+    ingestor._pending.clear()
+    ingestor.ingest([stale])
+
+    assert ingestor.store.bars("AAA")[-1].close == 104.0
+    assert not ingestor._pending
+
+
+def test_overlay_uses_live_quote(ingestor):
+    replay(ingestor)
+
+    rows = ingestor.store.overlay([
+        {"Symbol": "AAA", "Close": 100.0, "ChangeRate": 0.5, "Date": date(2026, 10, 16)},
+        {"Symbol": "^GSPC", "Close": 4900.0, "ChangeRate": 1.2, "Date": date(2026, 10, 16)},
+        {"Symbol": "BBB", "Close": 50.0, "ChangeRate": -1.0, "Date": date(2026, 10, 16)},
+    ])
+
+    # 전일 종가를 아는 종목: Close/ChangeRate 모두 실시간 값
+    assert rows[0]["Close"] == 104.0
+    assert rows[0]["ChangeRate"] == pytest.approx(4.0)
+    # 전일 종가를 모르는 종목: 이전 거래일 DB 종가를 기준으로 등락률 계산
+    assert rows[1]["Close"] == 5000.0
+    assert rows[1]["ChangeRate"] == pytest.approx((5000.0 / 4900.0 - 1) * 100)
+    # 장중 데이터가 없는 종목: DB 값 그대로
+    assert rows[2] == {"Symbol": "BBB", "Close": 50.0, "ChangeRate": -1.0, "Date": date(2026, 10, 16)}
+
+
+def test_overlay_skips_row_without_prev_close_on_same_day(ingestor):
+    replay(ingestor)
+
+    # 같은 날 일봉만 있고 전일 종가를 모르면 등락률 기준이 없으므로 DB 값 유지
+    row = {"Symbol": "^GSPC", "Close": 4990.0, "ChangeRate": 1.2, "Date": date(2026, 10, 19)}
+    assert ingestor.store.overlay([row]) == [row]
+
+
+def test_overlay_skips_quotes_older_than_daily_bar(ingestor):
+    replay(ingestor)
+
+    row = {"Symbol": "AAA", "Close": 110.0, "ChangeRate": 2.0, "Date": date(2026, 10, 20)}
+    assert ingestor.store.overlay([row]) == [row]
+
+
+def test_prev_close_failure_does_not_drop_bars(ingestor):
+    calls = []
+
+    def flaky_loader(day):
+        calls.append(day)
+        if len(calls) <= 2:
+            raise ConnectionError("db down")
+        return {"AAA": 100.0}
+
+    ingestor.prev_close_loader = flaky_loader
+    replay(ingestor)
+
+    # 분봉은 하나도 빠지지 않음 (버퍼 크기 3 + 같은 분 교체)
+    assert [bar.close for bar in ingestor.store.bars("AAA")] == [101.0, 102.0, 104.0]
+    assert [bar.close for bar in ingestor.store.bars("^GSPC")] == [5000.0]
+    assert len(ingestor._pending) == 5
+
+    # 폴링마다 한 번만 재시도하고, 성공한 뒤로는 등락률 제공
+    assert len(calls) == 3
+    assert ingestor.store.quote("AAA")["ChangeRate"] == pytest.approx(4.0)
+
+
+class FakeSession:
+    """flush() 가 사용하는 Session 인터페이스만 흉내낸 가짜 세션"""
+
+    Row = namedtuple("Row", ["symbol"])
+
+    def __init__(self, db):
+        self.db = db
+        self._staged = []
+
+    def query(self, *args):
+        return self
+
+    def filter(self, *args):
+        return [self.Row(symbol) for symbol in self.db.known]
+
+    def execute(self, stmt):
+        self.db.executions += 1
+        if self.db.executions == self.db.fail_at:
+            if self.db.on_failure:
+                self.db.on_failure()
+            raise ConnectionError("db down")
+
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        rows = [(params[f"ticker_symbol_m{i}"], params[f"ts_m{i}"], params[f"close_m{i}"])
+                for i in range(len(params)) if f"ticker_symbol_m{i}" in params]
+        self._staged.append(rows)
+
+    def commit(self):
+        self.db.statements.extend(self._staged)
+        self._staged = []
+
+    def rollback(self):
+        self._staged = []
+
+    def close(self):
+        pass
+
+
+class FakeDB:
+    def __init__(self, known, fail_at=None, on_failure=None):
+        self.known = known
+        self.fail_at = fail_at  # 몇 번째 execute 에서 한 번 실패할지
+        self.on_failure = on_failure
+        self.executions = 0
+        self.statements = []
+
+    def session_factory(self):
+        return FakeSession(self)
+
+
+def minute_bar(symbol, minute, close):
+    return Bar(symbol, datetime(2026, 10, 19, 9, minute), close, close, close, close, 1)
+
+
+@pytest.fixture
+def flushing_ingestor():
+    def make(db, flush_size=500):
+        return IntradayIngestor(
+            feed=None,
+            store=IntradayStore(size=10),
+            session_factory=db.session_factory,
+            prev_close_loader=lambda day: {},
+            flush_size=flush_size,
+        )
+    return make
+
+
+def test_flush_writes_in_chunks(flushing_ingestor):
+    db = FakeDB(known={"AAA"})
+    ingestor = flushing_ingestor(db, flush_size=2)
+    ingestor.ingest([minute_bar("AAA", m, 100.0 + m) for m in range(30, 35)])
+
+    ingestor.flush()
+
+    assert [len(rows) for rows in db.statements] == [2, 2, 1]
+    assert [close for rows in db.statements for _, _, close in rows] == [130.0, 131.0, 132.0, 133.0, 134.0]
+    assert not ingestor._pending
+
+
+def test_flush_skips_unknown_symbols(flushing_ingestor):
+    db = FakeDB(known={"AAA"})
+    ingestor = flushing_ingestor(db)
+    ingestor.ingest([minute_bar("AAA", 30, 100.0), minute_bar("ZZZ", 30, 1.0)])
+
+    ingestor.flush()
+
+    assert [symbol for rows in db.statements for symbol, _, _ in rows] == ["AAA"]
+    assert not ingestor._pending
+
+
+def test_flush_failure_restores_pending_and_retries(flushing_ingestor):
+    db = FakeDB(known={"AAA"}, fail_at=2)
+    ingestor = flushing_ingestor(db, flush_size=1)
+    ingestor.ingest([minute_bar("AAA", 30, 100.0), minute_bar("AAA", 31, 101.0)])
+
+    # 두 번째 청크에서 실패하면 트랜잭션 전체가 롤백되어 모든 분봉이 대기열로 복구
+    ingestor.flush()
+    assert db.executions == 2
+    assert not db.statements
+    assert {key: bar.close for key, bar in ingestor._pending.items()} == {
+        ("AAA", datetime(2026, 10, 19, 9, 30)): 100.0,
+        ("AAA", datetime(2026, 10, 19, 9, 31)): 101.0,
+    }
+
+    # 재시도 전에 같은 분봉이 갱신되면 최신 값이 저장됨
+    ingestor.ingest([minute_bar("AAA", 31, 101.5)])
+    ingestor.flush()
+
+    assert [rows[0][2] for rows in db.statements] == [100.0, 101.5]
+    assert not ingestor._pending
+
+
+def test_flush_failure_keeps_newer_pending_values(flushing_ingestor):
+    db = FakeDB(known={"AAA"}, fail_at=1)
+    ingestor = flushing_ingestor(db)
+    ingestor.ingest([minute_bar("AAA", 30, 100.0)])
+
+    # 저장 시도 도중 같은 분봉이 갱신된 경우, 복구되는 옛 값이 최신 값을 덮어쓰지 않음
+    db.on_failure = lambda: ingestor.ingest([minute_bar("AAA", 30, 100.7)])
+    ingestor.flush()
+
+    assert [bar.close for bar in ingestor._pending.values()] == [100.7]
+
+
+def yf_frame(symbol, minutes):
+    """yf.download(group_by="ticker") 형태의 1분봉 DataFrame"""
+    index = pd.DatetimeIndex(
+        [datetime(2026, 10, 19, 9, m) for m in minutes]
+    ).tz_localize("America/New_York")
+    columns = pd.MultiIndex.from_product([[symbol], ["Open", "High", "Low", "Close", "Volume"]])
+    rows = [[100.0 + m] * 4 + [1000] for m in minutes]
+    return pd.DataFrame(rows, index=index, columns=columns)
+
+
+def test_yfinance_feed_fetches_incrementally(monkeypatch):
+    calls = []
+    frames = iter([yf_frame("BRK-B", [30, 31, 32]), yf_frame("BRK-B", [32, 33])])
+
+    def fake_download(tickers, **kwargs):
+        calls.append(kwargs)
+        return next(frames)
+
+    monkeypatch.setattr(intraday.yf, "download", fake_download)
+    feed = YFinanceFeed(["BRKB"])
+
+    first = feed.poll()
+    second = feed.poll()
+
+    # 첫 호출만 당일 전체, 이후에는 마지막 분봉부터 (DB 심볼로 변환)
+    assert calls[0]["period"] == "1d" and "start" not in calls[0]
+    assert calls[1]["start"] == pd.Timestamp("2026-10-19 09:32", tz="America/New_York")
+    assert "period" not in calls[1]
+    assert [(bar.symbol, bar.ts.minute) for bar in first] == [("BRKB", 30), ("BRKB", 31), ("BRKB", 32)]
+    assert [bar.ts.minute for bar in second] == [32, 33]
+    assert second[0].ts.tzinfo is None
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL 미설정 (Postgres 필요)")
+def test_only_one_ingestor_holds_the_lock():
+    engine = create_engine(os.environ["TEST_DATABASE_URL"])
+    try:
+        first = acquire_ingestor_lock(engine)
+        assert first is not None
+        assert acquire_ingestor_lock(engine) is None
+
+        release_ingestor_lock(first)
+        second = acquire_ingestor_lock(engine)
+        assert second is not None
+        release_ingestor_lock(second)
+    finally:
+        engine.dispose()